@@ -0,0 +1,34 @@
+"""Decodifica el log binario de métricas (CONFIG["log_format"] = "binary")"""
+import sys
+import struct
+from datetime import datetime
+
+# Debe coincidir con BIN_RECORD en main.py
+BIN_RECORD = struct.Struct('<dffffffff')
+
+FIELDS = (
+    "cpu_percent", "cpu_freq",
+    "memory_percent", "memory_used_gb", "memory_total_gb",
+    "disk_percent", "disk_used_gb", "disk_total_gb"
+)
+
+
+def read_records(path):
+    """Itera los registros del log binario como diccionarios"""
+    with open(path, "rb") as f:
+        while chunk := f.read(BIN_RECORD.size):
+            if len(chunk) < BIN_RECORD.size:
+                break  # registro truncado al final (escritura interrumpida)
+            values = BIN_RECORD.unpack(chunk)
+            record = {"timestamp": datetime.fromtimestamp(values[0]).isoformat()}
+            record.update(zip(FIELDS, values[1:]))
+            yield record
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Uso: python binLogReader.py logs/hardware_metrics.bin")
+        sys.exit(1)
+
+    for record in read_records(sys.argv[1]):
+        print(record)
@@ -4,8 +4,14 @@ CONFIG = {
     "log_file": "logs/hardware_metrics.txt",
     "db_file": "logs/hardware_metrics.db",
     "log_compression": True,
+    "log_format": "json",  # "json" (jsonl.gz) o "binary" (registros de ancho fijo)
+    "db_batch_size": 12,  # muestras por transacción (12 = 1 min a intervalo de 5s)
+    "db_retention_days": 30,  # poda métricas más viejas (0 = conservar todo)
     "check_updates_interval": 86400,
     "metrics_interval": 5,
+    "temp_poll_seconds": 30,  # leer sensores (sysfs) cada tanto, no por tick
+    "collect_temps": True,  # False deshabilita el muestreo de sensores
+    "collect_net": True,  # False deshabilita los contadores de red
     "update_timeout": 30,
     "debug": True,
     "github_token": os.getenv("GITHUB_TOKEN", ""),
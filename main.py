@@ -1,7 +1,6 @@
 import os
 import json
-import subprocess
-import requests
+import atexit
 from datetime import datetime
 import psutil
 import time
@@ -12,94 +11,486 @@ import shutil
 from dotenv import load_dotenv
 import sqlite3
 import gzip
+import struct
+import concurrent.futures
 import threading
-from flask import Flask, render_template, jsonify
+import queue
 from config import CONFIG
 from webService import *
 
+# zstd comprime ~3x más rápido que gzip a ratio similar; si no está
+# instalado se sigue usando gzip
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+# orjson serializa en C (~5x más rápido que json); opcional
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    def _json_dumps(obj):
+        return orjson.dumps(obj).decode()
+else:
+    def _json_dumps(obj):
+        return json.dumps(obj, ensure_ascii=False)
+
 # Cargar variables de entorno
 load_dotenv()
 
+# Conversión bytes -> GiB calculada una sola vez
+_GIB = 1 << 30
+
+# Registro binario de ancho fijo: ts, cpu%, freq, mem%, mem_used,
+# mem_total, disk%, disk_used, disk_total (40 bytes vs ~300 de texto)
+BIN_RECORD = struct.Struct('<dffffffff')
+
+# Plataforma resuelta una sola vez al importar el módulo
+_SYSTEM = platform.system()
+_IS_POSIX = _SYSTEM in ("Linux", "Darwin")
+_EXEC_NAMES = {
+    "Windows": "hardwareMonitor-Windows.exe",
+    "Darwin": "hardwareMonitor-macOS",
+    "Linux": "hardwareMonitor-Linux"
+}
+
+# SQL de inserción como constante: sqlite3 cachea la sentencia preparada
+# por identidad del string, así el parse/codegen ocurre una sola vez.
+# OR IGNORE descarta filas duplicadas sin abortar el lote
+_INSERT_SQL = '''
+    INSERT OR IGNORE INTO metrics (
+        timestamp, cpu_percent, cpu_freq, cpu_count, cpu_temp,
+        memory_percent, memory_used_gb, memory_total_gb, memory_available_gb,
+        disk_percent, disk_used_gb, disk_total_gb, disk_free_gb,
+        disk_read_count, disk_write_count, disk_read_bytes, disk_write_bytes,
+        temp_cpu, temp_gpu, temp_ssd, temp_hdd,
+        network_bytes_sent, network_bytes_recv, network_packets_sent, network_packets_recv,
+        processes_count, threads_count,
+        disk_read_bps, disk_write_bps, net_sent_bps, net_recv_bps
+    ) VALUES (?, ?, ?, ?, ?,
+              ?, ?, ?, ?,
+              ?, ?, ?, ?,
+              ?, ?, ?, ?,
+              ?, ?, ?, ?,
+              ?, ?, ?, ?,
+              ?, ?,
+              ?, ?, ?, ?)
+'''
+
+# DDL de la tabla principal: también se usa para reconstruirla al
+# migrar una BD con timestamps TEXT
+_CREATE_METRICS_SQL = '''
+    CREATE TABLE IF NOT EXISTS metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp INTEGER UNIQUE,
+
+        cpu_percent REAL,
+        cpu_freq REAL,
+        cpu_count INTEGER,
+        cpu_temp REAL,
+
+        memory_percent REAL,
+        memory_used_gb REAL,
+        memory_total_gb REAL,
+        memory_available_gb REAL,
+
+        disk_percent REAL,
+        disk_used_gb REAL,
+        disk_total_gb REAL,
+        disk_free_gb REAL,
+        disk_read_count INTEGER,
+        disk_write_count INTEGER,
+        disk_read_bytes REAL,
+        disk_write_bytes REAL,
+
+        temp_cpu REAL,
+        temp_gpu REAL,
+        temp_ssd REAL,
+        temp_hdd REAL,
+
+        network_bytes_sent REAL,
+        network_bytes_recv REAL,
+        network_packets_sent INTEGER,
+        network_packets_recv INTEGER,
+
+        processes_count INTEGER,
+        threads_count INTEGER,
+
+        disk_read_bps REAL,
+        disk_write_bps REAL,
+        net_sent_bps REAL,
+        net_recv_bps REAL
+    )
+'''
+
+# Clasificación de sensores: el orden replica la prioridad original
+# (cpu, gpu, ssd, hdd); la primera palabra clave que aparece gana
+_SENSOR_KEYWORDS = (
+    ("coretemp", "cpu"), ("package", "cpu"), ("cpu", "cpu"),
+    ("nvidia", "gpu"), ("amd", "gpu"), ("radeon", "gpu"), ("gpu", "gpu"),
+    ("nvme", "ssd"), ("ssd", "ssd"), ("m.2", "ssd"),
+    ("ata", "hdd"), ("hdd", "hdd"), ("sata", "hdd"),
+)
+
+# Actualización incremental del resumen: /api/stats lee una sola fila
+# en vez de agregar toda la tabla
+_SUMMARY_SQL = '''
+    UPDATE metrics_summary SET
+        total_registros = total_registros + ?,
+        cpu_sum = cpu_sum + ?, cpu_max = MAX(cpu_max, ?),
+        ram_sum = ram_sum + ?, ram_max = MAX(ram_max, ?),
+        disk_sum = disk_sum + ?, disk_max = MAX(disk_max, ?),
+        temp_cpu_sum = temp_cpu_sum + ?, temp_cpu_count = temp_cpu_count + ?,
+        temp_cpu_max = MAX(temp_cpu_max, ?),
+        temp_gpu_sum = temp_gpu_sum + ?, temp_gpu_count = temp_gpu_count + ?,
+        temp_ssd_sum = temp_ssd_sum + ?, temp_ssd_count = temp_ssd_count + ?,
+        temp_hdd_sum = temp_hdd_sum + ?, temp_hdd_count = temp_hdd_count + ?,
+        desde = COALESCE(MIN(desde, ?), ?)
+    WHERE id = 1
+'''
+
 class HardwareMonitor:
     def __init__(self):
         self.log_file = Path(CONFIG["log_file"])
         self.log_file.parent.mkdir(parents=True, exist_ok=True)
         self.running = True
-        
+
+        # Buffer de escritura para el log comprimido (menos syscalls)
+        self._log_buffer = []
+        self._log_buffer_bytes = 0
+        self._last_log_flush = time.monotonic()
+
+        # Writer comprimido persistente: conserva el estado del
+        # compresor entre registros (mejor ratio) y evita reabrir el
+        # archivo en cada flush; nivel 3 equilibra CPU y tamaño
+        self._gz = None
+        self._zs = None
+        if CONFIG["log_format"] != "binary" and CONFIG["log_compression"]:
+            if zstd is not None:
+                cctx = zstd.ZstdCompressor(level=3, threads=-1)
+                self._zs = cctx.stream_writer(
+                    open(self.log_file.with_suffix('.jsonl.zst'), 'ab'))
+            else:
+                self._gz = gzip.open(self.log_file.with_suffix('.jsonl.gz'), 'at',
+                                     compresslevel=3, encoding='utf-8')
+        atexit.register(self._close_compressed_log)
+
+        # Log binario de ancho fijo (opcional, mucho más compacto)
+        self._bin_fh = None
+        self._bin_path = self.log_file.with_suffix('.bin')
+        if CONFIG["log_format"] == "binary":
+            self._bin_fh = open(self._bin_path, 'ab')
+            atexit.register(self._close_binary_log)
+            # La compresión de logs rotados corre en segundo plano para
+            # no bloquear el muestreo
+            self._gzip_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
         # Inicializar base de datos
         self.db_file = Path(CONFIG["db_file"])
         self.init_database()
+
+        # Valores que no cambian durante la ejecución: se leen una sola vez
+        self.cpu_count = psutil.cpu_count()
+
+        # sensors_temperatures no existe en Windows: se resuelve una vez
+        # en lugar de disparar una excepción por tick
+        self._temp_fn = getattr(psutil, 'sensors_temperatures', None)
+
+        # Leer sysfs es lo más caro del tick y las temperaturas cambian
+        # lento: entre refrescos se sirve el último resultado
+        self._temp_cache = None
+        self._temp_last = 0.0
+
+        # Subsistemas opcionales: en un servidor sin sensores o sin
+        # interés en la red se ahorra la llamada completa por tick
+        self._collect_temps = CONFIG["collect_temps"]
+        self._collect_net = CONFIG["collect_net"]
+
+        # Raíz del disco a monitorear ('/' no existe en Windows)
+        if _SYSTEM == "Windows":
+            self._disk_root = os.getenv('SystemDrive', 'C:') + '\\'
+        else:
+            self._disk_root = '/'
+
+        # Pool para muestrear en paralelo los subsistemas independientes
+        self._sample_pool = concurrent.futures.ThreadPoolExecutor(max_workers=3)
+        # El uso de disco cambia en escala de minutos: se cachea el
+        # statvfs y solo se refresca cada 60 s
+        self._disk_usage_cache = (0.0, None)
+
+        # Contadores acumulados desde el boot: se guarda el valor
+        # anterior para derivar tasas (bytes/s) por intervalo
+        self._prev_disk_io = (time.monotonic(), psutil.disk_io_counters())
+        self._prev_net_io = (time.monotonic(), psutil.net_io_counters())
+
+        # Primera llamada para armar el delta interno de psutil:
+        # las siguientes llamadas con interval=None devuelven el promedio
+        # desde la llamada anterior sin bloquear
+        psutil.cpu_percent(interval=None)
+
+        # Los totales no cambian durante la corrida: van una sola vez en
+        # una línea de cabecera y se omiten de cada registro
+        if CONFIG["log_format"] != "binary" and CONFIG["log_compression"]:
+            header = _json_dumps({
+                "schema": 1,
+                "cpu_count": self.cpu_count,
+                "memory_total_gb": psutil.virtual_memory().total / _GIB,
+                "disk_total_gb": psutil.disk_usage('/').total / _GIB
+            }) + '\n'
+            self._log_buffer.append(header)
+            self._log_buffer_bytes += len(header)
     
     def init_database(self):
-        """Crea la base de datos SQLite con todas las métricas"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
+        """Crea la base de datos SQLite y deja una conexión persistente"""
+        # check_same_thread=False: la conexión se usa desde el thread
+        # escritor que drena la cola
+        is_new_db = not os.path.exists(self.db_file) or os.path.getsize(self.db_file) == 0
+        # cached_statements amplio: el INSERT y las consultas del
+        # dashboard quedan compiladas entre llamadas
+        self.conn = sqlite3.connect(self.db_file, check_same_thread=False,
+                                    cached_statements=256)
+        cursor = self.conn.cursor()
+
+        # Páginas de 8 KiB: las filas numéricas empaquetan más por página
+        # y el checkpoint escribe menos páginas. Solo aplica antes de
+        # crear la primera tabla; las BDs existentes mantienen su tamaño
+        if is_new_db:
+            cursor.execute('PRAGMA page_size=8192')
+            # Permite devolver al filesystem las páginas liberadas por
+            # la poda de retención sin un VACUUM completo
+            cursor.execute('PRAGMA auto_vacuum=INCREMENTAL')
+
+        # WAL: escrituras secuenciales al log y un solo fsync por
+        # checkpoint en lugar de uno por commit; los lectores (Flask)
+        # no bloquean al escritor
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.execute('PRAGMA mmap_size=268435456')   # 256 MiB mapeados
+        cursor.execute('PRAGMA cache_size=-65536')     # 64 MiB de caché
+        cursor.execute('PRAGMA busy_timeout=5000')
+        # WAL acotado: sin esto el -wal puede crecer sin límite si el
+        # proceso nunca queda ocioso
+        cursor.execute('PRAGMA wal_autocheckpoint=1000')
+
+        cursor.execute(_CREATE_METRICS_SQL)
+        # Migración liviana: BDs anteriores no tienen las columnas de tasas
+        existing = {row[1] for row in cursor.execute('PRAGMA table_info(metrics)')}
+        for col in ('disk_read_bps', 'disk_write_bps', 'net_sent_bps', 'net_recv_bps'):
+            if col not in existing:
+                cursor.execute(f'ALTER TABLE metrics ADD COLUMN {col} REAL')
+
+        # Las BDs creadas cuando timestamp era TEXT conservan esa
+        # afinidad aunque el CREATE diga INTEGER: los epoch nuevos se
+        # guardarían como texto y ordenarían antes que las filas ISO
+        # viejas. Se reconstruye la tabla una única vez
+        ts_type = cursor.execute(
+            "SELECT type FROM pragma_table_info('metrics') WHERE name = 'timestamp'"
+        ).fetchone()[0]
+        if ts_type.upper() == 'TEXT':
+            self._migrate_text_timestamps(cursor)
+        # timestamp UNIQUE ya crea su propio índice
+        # (sqlite_autoindex_metrics_1); uno explícito duplicaría el
+        # mantenimiento del B-tree en cada INSERT
+        cursor.execute('DROP INDEX IF EXISTS idx_timestamp')
+
+        # Resumen incremental (una sola fila): /api/stats deja de
+        # agregar toda la tabla en cada request
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS metrics_summary (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total_registros INTEGER,
+                cpu_sum REAL, cpu_max REAL,
+                ram_sum REAL, ram_max REAL,
+                disk_sum REAL, disk_max REAL,
+                temp_cpu_sum REAL, temp_cpu_count INTEGER, temp_cpu_max REAL,
+                temp_gpu_sum REAL, temp_gpu_count INTEGER,
+                temp_ssd_sum REAL, temp_ssd_count INTEGER,
+                temp_hdd_sum REAL, temp_hdd_count INTEGER,
+                desde INTEGER
+            )
+        ''')
+        # Sembrado único con lo ya acumulado (BDs anteriores a la tabla)
+        if cursor.execute('SELECT 1 FROM metrics_summary WHERE id = 1').fetchone() is None:
+            cursor.execute('''
+                INSERT INTO metrics_summary
+                SELECT 1, COUNT(*),
+                    COALESCE(SUM(cpu_percent), 0), COALESCE(MAX(cpu_percent), 0),
+                    COALESCE(SUM(memory_percent), 0), COALESCE(MAX(memory_percent), 0),
+                    COALESCE(SUM(disk_percent), 0), COALESCE(MAX(disk_percent), 0),
+                    COALESCE(SUM(temp_cpu), 0), COUNT(temp_cpu), COALESCE(MAX(temp_cpu), 0),
+                    COALESCE(SUM(temp_gpu), 0), COUNT(temp_gpu),
+                    COALESCE(SUM(temp_ssd), 0), COUNT(temp_ssd),
+                    COALESCE(SUM(temp_hdd), 0), COUNT(temp_hdd),
+                    MIN(timestamp)
+                FROM metrics
+            ''')
+
+        # Sensores normalizados: nombre una sola vez en sensor_names y
+        # lecturas (timestamp, sensor, valor) en vez de un JSON por fila
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS metrics (
+            CREATE TABLE IF NOT EXISTS sensor_names (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT UNIQUE,
-                
-                cpu_percent REAL,
-                cpu_freq REAL,
-                cpu_count INTEGER,
-                cpu_temp REAL,
-                
-                memory_percent REAL,
-                memory_used_gb REAL,
-                memory_total_gb REAL,
-                memory_available_gb REAL,
-                
-                disk_percent REAL,
-                disk_used_gb REAL,
-                disk_total_gb REAL,
-                disk_free_gb REAL,
-                disk_read_count INTEGER,
-                disk_write_count INTEGER,
-                disk_read_bytes REAL,
-                disk_write_bytes REAL,
-                
-                temp_cpu REAL,
-                temp_gpu REAL,
-                temp_ssd REAL,
-                temp_hdd REAL,
-                temperatures TEXT,
-                
-                network_bytes_sent REAL,
-                network_bytes_recv REAL,
-                network_packets_sent INTEGER,
-                network_packets_recv INTEGER,
-                
-                processes_count INTEGER,
-                threads_count INTEGER
+                name TEXT UNIQUE
             )
         ''')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON metrics(timestamp)')
-        conn.commit()
-        conn.close()
-    
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sensor_readings (
+                timestamp INTEGER,
+                sensor_id INTEGER,
+                value REAL,
+                PRIMARY KEY (timestamp, sensor_id)
+            )
+        ''')
+        self._sensor_ids = dict(cursor.execute('SELECT name, id FROM sensor_names'))
+        self.conn.commit()
+
+        # Lote de filas pendientes: se graban juntas en una transacción.
+        # El muestreador solo encola; un thread escritor drena la cola y
+        # hace los commits, así un fsync lento nunca frena el muestreo
+        self._pending = []
+        self._pending_temps = []  # (timestamp, {sensor: valor}) por fila
+        self._last_prune = time.monotonic()
+        # Cola acotada: si la BD se atasca de verdad (256 muestras ~21
+        # min) es preferible descartar muestras a comer RAM sin límite
+        self._write_queue = queue.Queue(maxsize=256)
+        self._db_writer = threading.Thread(target=self._drain_queue, daemon=True)
+        self._db_writer.start()
+        atexit.register(self.close_db_writer)
+
+    def _migrate_text_timestamps(self, cursor):
+        """Reconstruye metrics convirtiendo timestamps TEXT a epoch en µs"""
+        if CONFIG["debug"]:
+            print("[DB] Migrando timestamps TEXT a epoch en microsegundos...")
+
+        cursor.execute('ALTER TABLE metrics RENAME TO metrics_old')
+        cursor.execute(_CREATE_METRICS_SQL)
+
+        old_cols = {row[1] for row in cursor.execute('PRAGMA table_info(metrics_old)')}
+        new_cols = [row[1] for row in cursor.execute('PRAGMA table_info(metrics)')]
+        cols = ', '.join(c for c in new_cols
+                         if c in old_cols and c not in ('id', 'timestamp'))
+
+        # Filas ISO ('2025-...'): strftime con 'utc' las interpreta como
+        # hora local (así las escribía isoformat). Filas numéricas que
+        # quedaron guardadas como texto: CAST directo
+        ts_expr = '''
+            CASE WHEN timestamp GLOB '*-*'
+                 THEN CAST(strftime('%s', timestamp, 'utc') AS INTEGER) * 1000000
+                 ELSE CAST(timestamp AS INTEGER)
+            END
+        '''
+        cursor.execute(f'''
+            INSERT OR IGNORE INTO metrics (timestamp, {cols})
+            SELECT {ts_expr}, {cols} FROM metrics_old ORDER BY id
+        ''')
+
+        # Los blobs JSON de temperaturas viejos tienen hogar en el
+        # esquema normalizado: se vuelcan a sensor_readings antes de
+        # tirar la tabla (estas tablas pueden no existir todavía, se
+        # crean aquí con el mismo DDL que más abajo)
+        if 'temperatures' in old_cols:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sensor_names (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT UNIQUE
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sensor_readings (
+                    timestamp INTEGER,
+                    sensor_id INTEGER,
+                    value REAL,
+                    PRIMARY KEY (timestamp, sensor_id)
+                )
+            ''')
+            try:
+                cursor.execute('''
+                    INSERT OR IGNORE INTO sensor_names (name)
+                    SELECT DISTINCT json_each.key
+                    FROM metrics_old, json_each(metrics_old.temperatures)
+                    WHERE metrics_old.temperatures IS NOT NULL
+                      AND metrics_old.temperatures != ''
+                ''')
+                cursor.execute(f'''
+                    INSERT OR IGNORE INTO sensor_readings (timestamp, sensor_id, value)
+                    SELECT {ts_expr}, sensor_names.id, json_each.value
+                    FROM metrics_old, json_each(metrics_old.temperatures)
+                    JOIN sensor_names ON sensor_names.name = json_each.key
+                    WHERE metrics_old.temperatures IS NOT NULL
+                      AND metrics_old.temperatures != ''
+                ''')
+            except sqlite3.OperationalError as e:
+                # SQLite compilado sin JSON1: solo se pierde el detalle
+                # por sensor, la migración de timestamps sigue
+                if CONFIG["debug"]:
+                    print(f"[DB] No se pudieron volcar temperaturas viejas: {e}")
+
+        cursor.execute('DROP TABLE metrics_old')
+
+        # El resumen guardaba "desde" en el formato viejo: se descarta y
+        # el sembrado de más abajo lo regenera desde la tabla migrada
+        cursor.execute('DROP TABLE IF EXISTS metrics_summary')
+
+        if CONFIG["debug"]:
+            print("[DB] Migración de timestamps completada")
+
+
     def get_disk_info(self):
         """Obtiene información detallada de discos"""
         try:
-            disk_usage = psutil.disk_usage('/')
+            # shutil.disk_usage es un wrapper fino sobre statvfs, más
+            # liviano que la abstracción de psutil para este camino.
+            # Los contadores de E/S sí se leen en cada tick
+            stamp, disk_usage = self._disk_usage_cache
+            now = time.monotonic()
+            if disk_usage is None or now - stamp > 60:
+                disk_usage = shutil.disk_usage(self._disk_root)
+                self._disk_usage_cache = (now, disk_usage)
             disk_io = psutil.disk_io_counters()
-            
+
+            # Tasas del intervalo: delta contra la lectura anterior
+            prev_stamp, prev_io = self._prev_disk_io
+            dt = now - prev_stamp
+            read_bps = write_bps = 0
+            if disk_io and prev_io and dt > 0:
+                read_bps = (disk_io.read_bytes - prev_io.read_bytes) / dt
+                write_bps = (disk_io.write_bytes - prev_io.write_bytes) / dt
+            self._prev_disk_io = (now, disk_io)
+
             return {
-                "percent": disk_usage.percent,
-                "used_gb": disk_usage.used / (1024**3),
-                "total_gb": disk_usage.total / (1024**3),
-                "free_gb": disk_usage.free / (1024**3),
+                "percent": round(disk_usage.used / disk_usage.total * 100, 1),
+                "used_gb": disk_usage.used / _GIB,
+                "total_gb": disk_usage.total / _GIB,
+                "free_gb": disk_usage.free / _GIB,
                 "read_count": disk_io.read_count if disk_io else 0,
                 "write_count": disk_io.write_count if disk_io else 0,
-                "read_bytes": (disk_io.read_bytes / (1024**3)) if disk_io else 0,
-                "write_bytes": (disk_io.write_bytes / (1024**3)) if disk_io else 0
+                "read_bytes": (disk_io.read_bytes / _GIB) if disk_io else 0,
+                "write_bytes": (disk_io.write_bytes / _GIB) if disk_io else 0,
+                "read_bps": read_bps,
+                "write_bps": write_bps
             }
         except Exception as e:
             if CONFIG["debug"]:
                 print(f"[ERROR] Disk info: {e}")
-            return {}
+            # Dict completo en cero: una falla transitoria no debe
+            # tumbar el armado de la fila en write_metrics_to_db
+            return {
+                "percent": 0, "used_gb": 0, "total_gb": 0, "free_gb": 0,
+                "read_count": 0, "write_count": 0,
+                "read_bytes": 0, "write_bytes": 0,
+                "read_bps": 0, "write_bps": 0
+            }
     
     def get_all_temperatures(self):
         """Obtiene temperaturas de TODOS los componentes críticos"""
+        if (self._temp_cache is not None and
+                time.monotonic() - self._temp_last < CONFIG["temp_poll_seconds"]):
+            return self._temp_cache
+
         temps = {
             "cpu": None,
             "gpu": None,
@@ -107,67 +498,69 @@ class HardwareMonitor:
             "hdd": None,
             "all": {}
         }
-        
+
+        if self._temp_fn is None:
+            return temps
+
         try:
-            temps_data = psutil.sensors_temperatures()
-            
-            if not temps_data:
-                return temps
-            
+            temps_data = self._temp_fn() or {}
+
             # Mapeo de nombres comunes de sensores
             for sensor_name, sensor_list in temps_data.items():
+                if not sensor_list:
+                    continue
+
+                # Tomar la primera temperatura de cada sensor
+                current_temp = sensor_list[0].current
+                temps["all"][sensor_name] = current_temp
+
+                # Clasificar por tipo: una sola pasada por la tabla de
+                # palabras clave (ordenada por prioridad de categoría)
                 sensor_name_lower = sensor_name.lower()
-                
-                if sensor_list:
-                    # Tomar la primera temperatura de cada sensor
-                    current_temp = sensor_list[0].current
-                    temps["all"][sensor_name] = current_temp
-                    
-                    # Clasificar por tipo
-                    if any(x in sensor_name_lower for x in ["coretemp", "package", "cpu"]):
-                        if temps["cpu"] is None:
-                            temps["cpu"] = current_temp
-                        else:
-                            temps["cpu"] = max(temps["cpu"], current_temp)
-                    
-                    elif any(x in sensor_name_lower for x in ["nvidia", "amd", "radeon", "gpu"]):
-                        if temps["gpu"] is None:
-                            temps["gpu"] = current_temp
-                        else:
-                            temps["gpu"] = max(temps["gpu"], current_temp)
-                    
-                    elif any(x in sensor_name_lower for x in ["nvme", "ssd", "m.2"]):
-                        if temps["ssd"] is None:
-                            temps["ssd"] = current_temp
-                        else:
-                            temps["ssd"] = max(temps["ssd"], current_temp)
-                    
-                    elif any(x in sensor_name_lower for x in ["ata", "hdd", "sata"]):
-                        if temps["hdd"] is None:
-                            temps["hdd"] = current_temp
-                        else:
-                            temps["hdd"] = max(temps["hdd"], current_temp)
-        
-        except Exception as e:
+                for keyword, key in _SENSOR_KEYWORDS:
+                    if keyword in sensor_name_lower:
+                        if temps[key] is None or current_temp > temps[key]:
+                            temps[key] = current_temp
+                        break
+
+        except (AttributeError, OSError) as e:
             if CONFIG["debug"]:
                 print(f"[ERROR] Temperature sensors: {e}")
-        
+
+        self._temp_cache = temps
+        self._temp_last = time.monotonic()
         return temps
     
     def get_network_info(self):
         """Obtiene información de red"""
         try:
             net_io = psutil.net_io_counters()
+
+            now = time.monotonic()
+            prev_stamp, prev_io = self._prev_net_io
+            dt = now - prev_stamp
+            sent_bps = recv_bps = 0
+            if net_io and prev_io and dt > 0:
+                sent_bps = (net_io.bytes_sent - prev_io.bytes_sent) / dt
+                recv_bps = (net_io.bytes_recv - prev_io.bytes_recv) / dt
+            self._prev_net_io = (now, net_io)
+
             return {
-                "bytes_sent": net_io.bytes_sent / (1024**3),
-                "bytes_recv": net_io.bytes_recv / (1024**3),
+                "bytes_sent": net_io.bytes_sent / _GIB,
+                "bytes_recv": net_io.bytes_recv / _GIB,
                 "packets_sent": net_io.packets_sent,
-                "packets_recv": net_io.packets_recv
+                "packets_recv": net_io.packets_recv,
+                "sent_bps": sent_bps,
+                "recv_bps": recv_bps
             }
         except Exception as e:
             if CONFIG["debug"]:
                 print(f"[ERROR] Network info: {e}")
-            return {}
+            return {
+                "bytes_sent": 0, "bytes_recv": 0,
+                "packets_sent": 0, "packets_recv": 0,
+                "sent_bps": 0, "recv_bps": 0
+            }
     
     def get_process_info(self):
         """Obtiene información de procesos"""
@@ -179,44 +572,57 @@ class HardwareMonitor:
         except Exception as e:
             if CONFIG["debug"]:
                 print(f"[ERROR] Process info: {e}")
-            return {}
+            return {"processes": 0, "threads": 0}
     
     def get_hardware_metrics(self):
         """Obtiene métricas completas del hardware"""
         
-        # CPU
-        cpu_percent = psutil.cpu_percent(interval=1)
-        cpu_freq = psutil.cpu_freq().current if psutil.cpu_freq() else 0
-        cpu_count = psutil.cpu_count()
-        
+        # Temperaturas, disco y red tocan subsistemas distintos del
+        # kernel: se muestrean en paralelo mientras este thread lee CPU
+        # y memoria. Los subsistemas deshabilitados ni se consultan
+        f_temps = (self._sample_pool.submit(self.get_all_temperatures)
+                   if self._collect_temps else None)
+        f_disk = self._sample_pool.submit(self.get_disk_info)
+        f_net = (self._sample_pool.submit(self.get_network_info)
+                 if self._collect_net else None)
+
+        # CPU (sin bloquear: devuelve el promedio desde la última llamada)
+        cpu_percent = psutil.cpu_percent(interval=None)
+        freq = psutil.cpu_freq()
+        cpu_freq = freq.current if freq else 0
+
         # Memoria
         mem = psutil.virtual_memory()
-        
-        # Temperaturas
-        temps = self.get_all_temperatures()
-        
-        # Disco
-        disk_info = self.get_disk_info()
-        
-        # Red
-        net_info = self.get_network_info()
-        
+
         # Procesos
         proc_info = self.get_process_info()
-        
+
+        temps = (f_temps.result() if f_temps is not None
+                 else {"cpu": None, "gpu": None, "ssd": None, "hdd": None, "all": {}})
+        disk_info = f_disk.result()
+        net_info = (f_net.result() if f_net is not None
+                    else {"bytes_sent": 0, "bytes_recv": 0,
+                          "packets_sent": 0, "packets_recv": 0,
+                          "sent_bps": 0, "recv_bps": 0})
+
+        # Un solo time.time() por muestra; el formato ISO se calcula una
+        # única vez y se reutiliza en todos los destinos
+        now = time.time()
+
         metrics = {
-            "timestamp": datetime.now().isoformat(),
+            "ts": now,
+            "timestamp": datetime.fromtimestamp(now).isoformat(timespec='seconds'),
             "cpu": {
                 "percent": cpu_percent,
                 "freq": cpu_freq,
-                "count": cpu_count,
+                "count": self.cpu_count,
                 "temp": temps["cpu"]
             },
             "memory": {
                 "percent": mem.percent,
-                "used_gb": mem.used / (1024**3),
-                "total_gb": mem.total / (1024**3),
-                "available_gb": mem.available / (1024**3)
+                "used_gb": mem.used / _GIB,
+                "total_gb": mem.total / _GIB,
+                "available_gb": mem.available / _GIB
             },
             "disk": disk_info,
             "temperatures": temps,
@@ -226,125 +632,435 @@ class HardwareMonitor:
         
         return metrics
     
-    def write_metrics_to_db(self):
+    def write_metrics_to_db(self, metrics):
         """Guarda métricas completas en SQLite"""
-        metrics = self.get_hardware_metrics()
-        
+        # Sub-diccionarios a locales: una sola búsqueda por grupo
+        cpu = metrics["cpu"]
+        mem = metrics["memory"]
+        disk = metrics["disk"]
+        temps = metrics["temperatures"]
+        net = metrics["network"]
+        procs = metrics["processes"]
+
+        # Epoch en microsegundos: 8 bytes y comparación entera en el
+        # B-tree en lugar de ~27 bytes de texto ISO con memcmp.
+        # Las lecturas por sensor viajan aparte y van normalizadas a
+        # sensor_readings en el flush
+        item = (temps["all"], (
+                int(metrics["ts"] * 1_000_000),
+                cpu["percent"],
+                cpu["freq"],
+                cpu["count"],
+                cpu["temp"],
+                mem["percent"],
+                mem["used_gb"],
+                mem["total_gb"],
+                mem["available_gb"],
+                disk["percent"],
+                disk["used_gb"],
+                disk["total_gb"],
+                disk["free_gb"],
+                disk["read_count"],
+                disk["write_count"],
+                disk["read_bytes"],
+                disk["write_bytes"],
+                temps["cpu"],
+                temps["gpu"],
+                temps["ssd"],
+                temps["hdd"],
+                net["bytes_sent"],
+                net["bytes_recv"],
+                net["packets_sent"],
+                net["packets_recv"],
+                procs["processes"],
+                procs["threads"],
+                disk.get("read_bps", 0),
+                disk.get("write_bps", 0),
+                net.get("sent_bps", 0),
+                net.get("recv_bps", 0)
+        ))
+
         try:
-            conn = sqlite3.connect(self.db_file)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO metrics (
-                    timestamp, cpu_percent, cpu_freq, cpu_count, cpu_temp,
-                    memory_percent, memory_used_gb, memory_total_gb, memory_available_gb,
-                    disk_percent, disk_used_gb, disk_total_gb, disk_free_gb,
-                    disk_read_count, disk_write_count, disk_read_bytes, disk_write_bytes,
-                    temp_cpu, temp_gpu, temp_ssd, temp_hdd, temperatures,
-                    network_bytes_sent, network_bytes_recv, network_packets_sent, network_packets_recv,
-                    processes_count, threads_count
-                ) VALUES (?, ?, ?, ?, ?,
-                          ?, ?, ?, ?,
-                          ?, ?, ?, ?,
-                          ?, ?, ?, ?,
-                          ?, ?, ?, ?, ?,
-                          ?, ?, ?, ?,
-                          ?, ?)
-            ''', (
-                metrics["timestamp"],
-                metrics["cpu"]["percent"],
-                metrics["cpu"]["freq"],
-                metrics["cpu"]["count"],
-                metrics["cpu"]["temp"],
-                metrics["memory"]["percent"],
-                metrics["memory"]["used_gb"],
-                metrics["memory"]["total_gb"],
-                metrics["memory"]["available_gb"],
-                metrics["disk"]["percent"],
-                metrics["disk"]["used_gb"],
-                metrics["disk"]["total_gb"],
-                metrics["disk"]["free_gb"],
-                metrics["disk"]["read_count"],
-                metrics["disk"]["write_count"],
-                metrics["disk"]["read_bytes"],
-                metrics["disk"]["write_bytes"],
-                metrics["temperatures"]["cpu"],
-                metrics["temperatures"]["gpu"],
-                metrics["temperatures"]["ssd"],
-                metrics["temperatures"]["hdd"],
-                json.dumps(metrics["temperatures"]["all"]),
-                metrics["network"]["bytes_sent"],
-                metrics["network"]["bytes_recv"],
-                metrics["network"]["packets_sent"],
-                metrics["network"]["packets_recv"],
-                metrics["processes"]["processes"],
-                metrics["processes"]["threads"]
-            ))
-            
-            conn.commit()
-            conn.close()
-            
+            self._write_queue.put_nowait(item)
+        except queue.Full:
+            # Nunca bloquear el muestreo por un fsync atascado
             if CONFIG["debug"]:
-                print(f"[DB] Métrica guardada: {metrics['timestamp']}")
-    
-        except sqlite3.IntegrityError:
+                print("[DB] Cola de escritura llena, muestra descartada")
+
+    def _drain_queue(self):
+        """Thread escritor: drena la cola y graba por lotes"""
+        batch_size = CONFIG["db_batch_size"]
+        # Tope de antigüedad del lote: aunque el muestreo se frene, lo
+        # pendiente nunca espera más que esto en memoria
+        flush_timeout = CONFIG["metrics_interval"] * batch_size
+        while True:
+            try:
+                item = self._write_queue.get(timeout=flush_timeout)
+            except queue.Empty:
+                self.flush_pending()
+                continue
+            if item is None:
+                self.flush_pending()
+                return
+
+            self._enqueue_pending(item)
+
+            # Tomar lo que ya esté encolado sin bloquear
+            while len(self._pending) < batch_size:
+                try:
+                    item = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.flush_pending()
+                    return
+                self._enqueue_pending(item)
+
+            # Un commit amortiza el fsync de todo el lote
+            if len(self._pending) >= batch_size:
+                self.flush_pending()
+
+            if time.monotonic() - self._last_prune > 3600:
+                self.prune_old()
+                self._last_prune = time.monotonic()
+
+    def prune_old(self):
+        """Borra métricas más viejas que la retención configurada"""
+        days = CONFIG["db_retention_days"]
+        if not days:
+            return
+
+        cutoff = int((time.time() - days * 86400) * 1_000_000)
+        try:
+            with self.conn:
+                deleted = self.conn.execute(
+                    'DELETE FROM metrics WHERE timestamp < ?', (cutoff,)).rowcount
+                self.conn.execute(
+                    'DELETE FROM sensor_readings WHERE timestamp < ?', (cutoff,))
+            if deleted > 0:
+                # Devuelve páginas liberadas de a poco (no-op en BDs
+                # creadas sin auto_vacuum)
+                self.conn.execute('PRAGMA incremental_vacuum(1000)')
+                if CONFIG["debug"]:
+                    print(f"[DB] Retención: {deleted} filas podadas")
+        except sqlite3.Error as e:
             if CONFIG["debug"]:
-                print(f"[DB] Registro duplicado (mismo timestamp)")
-    
+                print(f"[DB] Error en la poda de retención: {e}")
+
+    def close_db_writer(self):
+        """Detiene el thread escritor y graba lo que quede pendiente"""
+        if self._db_writer.is_alive():
+            try:
+                self._write_queue.put_nowait(None)
+            except queue.Full:
+                # Cola llena = escritor atascado: un put bloqueante
+                # dejaría al proceso sin poder salir; el join acotado
+                # de abajo decide
+                pass
+            self._db_writer.join(timeout=10)
+
+        # Dejar la BD prolija para el próximo arranque: corre los
+        # ANALYZE diferidos y trunca el archivo WAL
+        try:
+            self.conn.execute("PRAGMA optimize")
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error:
+            pass
+
+    def _enqueue_pending(self, item):
+        """Separa un item de la cola en fila de metrics y lecturas"""
+        sensors, row = item
+        self._pending.append(row)
+        if sensors:
+            self._pending_temps.append((row[0], sensors))
+
+    def _sensor_readings(self):
+        """Resuelve ids de sensores (cacheados) y arma las lecturas"""
+        readings = []
+        for ts, sensors in self._pending_temps:
+            for name, value in sensors.items():
+                sensor_id = self._sensor_ids.get(name)
+                if sensor_id is None:
+                    self.conn.execute(
+                        'INSERT OR IGNORE INTO sensor_names (name) VALUES (?)', (name,))
+                    sensor_id = self.conn.execute(
+                        'SELECT id FROM sensor_names WHERE name = ?', (name,)).fetchone()[0]
+                    self._sensor_ids[name] = sensor_id
+                readings.append((ts, sensor_id, value))
+        return readings
+
+    @staticmethod
+    def _summary_params(rows):
+        """Agrega el lote en Python y arma los parámetros de _SUMMARY_SQL"""
+        cpu = [r[1] for r in rows]
+        ram = [r[5] for r in rows]
+        disk = [r[9] for r in rows]
+        params = [len(rows),
+                  sum(cpu), max(cpu),
+                  sum(ram), max(ram),
+                  sum(disk), max(disk)]
+
+        temp_cpu = [r[17] for r in rows if r[17] is not None]
+        params += [sum(temp_cpu), len(temp_cpu), max(temp_cpu, default=0)]
+        for idx in (18, 19, 20):  # temp_gpu, temp_ssd, temp_hdd
+            vals = [r[idx] for r in rows if r[idx] is not None]
+            params += [sum(vals), len(vals)]
+
+        first_ts = rows[0][0]
+        params += [first_ts, first_ts]
+        return params
+
+    def flush_pending(self):
+        """Graba el lote de métricas pendientes en una sola transacción"""
+        if not self._pending:
+            return
+
+        try:
+            # conn.execute* evita instanciar un Cursor por flush y el
+            # context manager hace commit/rollback atómico del lote
+            with self.conn:
+                self.conn.executemany(_INSERT_SQL, self._pending)
+                readings = self._sensor_readings()
+                if readings:
+                    self.conn.executemany(
+                        'INSERT OR IGNORE INTO sensor_readings VALUES (?, ?, ?)',
+                        readings)
+                self.conn.execute(_SUMMARY_SQL, self._summary_params(self._pending))
+
+            if CONFIG["debug"]:
+                print(f"[DB] Lote de {len(self._pending)} métricas guardado")
+            self._pending.clear()
+            self._pending_temps.clear()
+
         except Exception as e:
             if CONFIG["debug"]:
                 print(f"[DB] Error guardando métricas: {e}")
+            # El rollback también deshizo los INSERT de sensor_names:
+            # los ids cacheados en la transacción fallida ya no existen
+            # y el próximo flush debe re-resolverlos contra la BD
+            self._sensor_ids.clear()
+            # El lote se conserva para reintentar, pero acotado: si la
+            # BD falla de forma persistente no puede crecer sin límite
+            # (misma razón que la cola acotada)
+            max_pending = CONFIG["db_batch_size"] * 4
+            if len(self._pending) > max_pending:
+                dropped = len(self._pending) - max_pending
+                del self._pending[:dropped]
+                oldest_ts = self._pending[0][0]
+                self._pending_temps = [t for t in self._pending_temps
+                                       if t[0] >= oldest_ts]
+                if CONFIG["debug"]:
+                    print(f"[DB] Lote recortado: {dropped} muestras viejas descartadas")
     
     def write_metrics(self):
-        """Escribe las métricas (DB + Comprimido)"""
-        self.write_metrics_to_db()
-        
+        """Escribe las métricas (DB + Comprimido/Binario)"""
+        # Una sola muestra por tick: todos los destinos reciben el mismo
+        # snapshot (antes DB y JSONL muestreaban por separado)
+        metrics = self.get_hardware_metrics()
+
+        self.write_metrics_to_db(metrics)
+
+        if CONFIG["log_format"] == "binary":
+            self.write_metrics_binary(metrics)
+        elif CONFIG["log_compression"]:
+            self.write_metrics_compressed(metrics)
+
+        return metrics
+
+    def write_metrics_binary(self, metrics):
+        """Escribe un registro binario de ancho fijo al log"""
+        cpu = metrics["cpu"]
+        mem = metrics["memory"]
+        disk = metrics["disk"]
+
+        try:
+            self._bin_fh.write(BIN_RECORD.pack(
+                metrics["ts"],
+                cpu["percent"],
+                cpu["freq"],
+                mem["percent"],
+                mem["used_gb"],
+                mem["total_gb"],
+                disk.get("percent", 0),
+                disk.get("used_gb", 0),
+                disk.get("total_gb", 0)
+            ))
+
+            # Rotación al superar 4 MiB
+            if self._bin_fh.tell() > 4 << 20:
+                self._rotate_binary_log()
+        except Exception as e:
+            if CONFIG["debug"]:
+                print(f"[ERROR] Log binario: {e}")
+
+    def _rotate_binary_log(self):
+        """Rota el log binario y lo comprime en un thread aparte"""
+        self._bin_fh.close()
+        rotated = self.log_file.with_suffix(f'.{int(time.time())}.bin')
+        os.replace(self._bin_path, rotated)
+        self._bin_fh = open(self._bin_path, 'ab')
+
         if CONFIG["log_compression"]:
-            self.write_metrics_compressed()
+            self._gzip_executor.submit(self._gzip_file, rotated)
+
+    def _gzip_file(self, path):
+        """Comprime un log rotado y elimina el original"""
+        try:
+            with open(path, 'rb') as src, gzip.open(f"{path}.gz", 'wb', compresslevel=1) as dst:
+                shutil.copyfileobj(src, dst, length=1 << 20)
+            os.unlink(path)
+        except Exception as e:
+            if CONFIG["debug"]:
+                print(f"[ERROR] Compresión de log rotado: {e}")
+
+    def _close_binary_log(self):
+        """Cierra el log binario al terminar el proceso"""
+        if self._bin_fh and not self._bin_fh.closed:
+            self._bin_fh.close()
     
-    def write_metrics_compressed(self):
-        """Escribe métricas en JSON comprimido"""
-        metrics = self.get_hardware_metrics()
-        json_data = json.dumps(metrics, ensure_ascii=False)
-        
-        log_gz = self.log_file.with_suffix('.jsonl.gz')
-        
+    def write_metrics_compressed(self, metrics):
+        """Acumula métricas en el buffer y las comprime por lotes"""
+        json_data = _json_dumps(self._strip_static_fields(metrics)) + '\n'
+
+        self._log_buffer.append(json_data)
+        self._log_buffer_bytes += len(json_data)
+
+        # Flush por tamaño (32 KB) o por tiempo (60s) para no perder datos
+        if self._log_buffer_bytes > 32768 or time.monotonic() - self._last_log_flush > 60:
+            self.flush_log_buffer()
+
+    def _strip_static_fields(self, metrics):
+        """Quita del registro los campos que ya están en la cabecera"""
+        record = dict(metrics)
+        record["cpu"] = {k: v for k, v in metrics["cpu"].items() if k != "count"}
+        record["memory"] = {k: v for k, v in metrics["memory"].items() if k != "total_gb"}
+        if metrics["disk"]:
+            record["disk"] = {k: v for k, v in metrics["disk"].items() if k != "total_gb"}
+        return record
+
+    def flush_log_buffer(self):
+        """Escribe el buffer acumulado al log comprimido en una sola operación"""
+        if not self._log_buffer or (self._gz is None and self._zs is None):
+            return
+
         try:
-            with gzip.open(log_gz, 'at', encoding='utf-8') as f:
-                f.write(json_data + '\n')
+            payload = ''.join(self._log_buffer)
+            if self._zs is not None:
+                self._zs.write(payload.encode('utf-8'))
+            else:
+                self._gz.write(payload)
+            self._log_buffer.clear()
+            self._log_buffer_bytes = 0
+            self._last_log_flush = time.monotonic()
         except Exception as e:
             if CONFIG["debug"]:
                 print(f"[ERROR] Compresión: {e}")
 
+    def _close_compressed_log(self):
+        """Vacía el buffer y cierra el writer comprimido al terminar"""
+        self.flush_log_buffer()
+        if self._zs is not None:
+            self._zs.close()
+        if self._gz and not self._gz.closed:
+            self._gz.close()
+
 class GitUpdater:
     def __init__(self, repo):
         self.repo = repo
         self.current_version = self.get_local_version()
-        self.system = platform.system()
+        self.system = _SYSTEM
         self.executable_name = self.get_executable_name()
         self.current_executable = self.get_current_executable_path()
         self.update_log = Path("logs/update_log.txt")
         self.update_log.parent.mkdir(parents=True, exist_ok=True)
+        # Handle persistente y bufferizado: un open/close por proceso en
+        # lugar de uno por mensaje
+        self._log_fh = open(self.update_log, 'a', encoding='utf-8', buffering=8192)
+        atexit.register(self._log_fh.close)
         self.temp_update_file = f"{self.executable_name}.update"
+
+        # Cache de ETag para requests condicionales a GitHub
+        self.release_cache_file = Path("logs/.release_cache.json")
+        self._etag = None
+        self._cached_version = None
+        self.load_release_cache()
         
         self.headers = {
             'User-Agent': 'hardwareMonitor-updater/1.0',
             'Accept': 'application/vnd.github.v3+json'
         }
         
+        # Import diferido: requests tarda ~40ms en cargar y solo lo usa
+        # el actualizador
+        import requests
+        from requests.adapters import HTTPAdapter, Retry
+
+        # Sesión persistente: una sola negociación TCP+TLS reutilizada
+        # por todas las llamadas a GitHub, con reintentos automáticos
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self._conn_error = requests.exceptions.ConnectionError
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=4,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+        ))
+
         if CONFIG["github_token"]:
             self.headers['Authorization'] = f'token {CONFIG["github_token"]}'
+            self.session.headers['Authorization'] = self.headers['Authorization']
             self.debug_print(f"✓ Token de GitHub configurado (últimos 4 caracteres: ...{CONFIG['github_token'][-4:]})")
         else:
             self.debug_print("⚠️  Sin token: rate limit de 60 requests/hora")
         
         self.check_pending_update()
-        
+
         self.debug_print(f"Sistema: {self.system}")
         self.debug_print(f"Versión local: {self.current_version}")
         self.debug_print(f"Ejecutable actual: {self.current_executable}")
         self.debug_print(f"Nombre esperado: {self.executable_name}")
-    
+
+        # Las verificaciones corren en un thread aparte para que la red
+        # nunca bloquee el muestreo de métricas
+        self._version_lock = threading.Lock()
+        self._update_thread = threading.Thread(target=self._update_worker, daemon=True)
+        self._update_thread.start()
+
+    def _update_worker(self):
+        """Bucle en segundo plano que verifica actualizaciones periódicamente"""
+        check_interval = CONFIG["check_updates_interval"]
+        # Primera verificación al poco de arrancar: con el intervalo de
+        # 24h, un proceso que se reinicia seguido nunca llegaría a
+        # chequear (y las actualizaciones solo se aplican al arrancar)
+        time.sleep(30)
+        while True:
+            print("\n[UPDATE] Verificando actualizaciones...")
+            self.check_for_updates()
+            get_db_size_stats()
+            print()
+            time.sleep(check_interval)
+
+    def load_release_cache(self):
+        """Carga el ETag y la versión cacheados de la última consulta a GitHub"""
+        try:
+            with open(self.release_cache_file, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+            if cache.get("repo") == self.repo:
+                self._etag = cache.get("etag")
+                self._cached_version = cache.get("version")
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+    def save_release_cache(self, etag, version):
+        """Persiste el ETag y la versión para la próxima ejecución"""
+        self._etag = etag
+        self._cached_version = version
+        try:
+            with open(self.release_cache_file, "w", encoding="utf-8") as f:
+                json.dump({"repo": self.repo, "etag": etag, "version": version}, f)
+        except Exception as e:
+            self.debug_print(f"⚠️  No se pudo guardar el cache de release: {e}")
+
     def check_pending_update(self):
         """Verifica si hay una actualización pendiente desde la ejecución anterior"""
         if os.path.exists(self.temp_update_file):
@@ -352,12 +1068,15 @@ class GitUpdater:
             try:
                 backup_name = f"{self.executable_name}.backup"
                 if os.path.exists(self.executable_name):
-                    shutil.move(self.executable_name, backup_name)
+                    # Renombrar en vez de copiar: un syscall, sin duplicar bytes
+                    os.replace(self.executable_name, backup_name)
                     self.debug_print(f"💾 Backup del ejecutable anterior: {backup_name}")
-                
-                shutil.move(self.temp_update_file, self.executable_name)
-                
-                if self.system in ["Linux", "Darwin"]:
+
+                # os.replace es atómico: nunca queda un estado intermedio
+                # sin ejecutable en el path canónico
+                os.replace(self.temp_update_file, self.executable_name)
+
+                if _IS_POSIX:
                     os.chmod(self.executable_name, 0o755)
                 
                 self.debug_print(f"✅ Actualización aplicada exitosamente")
@@ -366,34 +1085,14 @@ class GitUpdater:
     
     def debug_print(self, msg):
         """Imprime mensaje de debug tanto en consola como en archivo"""
-        if CONFIG["debug"]:
-            print(f"[DEBUG] {msg}")
-        with open(self.update_log, 'a', encoding='utf-8') as f:
-            f.write(f"[{datetime.now().isoformat()}] {msg}\n")
-    
-    def test_connection(self):
-        """Prueba la conexión a GitHub"""
-        self.debug_print("Probando conexión a GitHub...")
-        try:
-            response = requests.get(
-                "https://api.github.com",
-                headers=self.headers,
-                timeout=10
-            )
-            self.debug_print(f"✓ Conexión exitosa (código: {response.status_code})")
-            return True
-        except Exception as e:
-            self.debug_print(f"✗ Error de conexión: {e}")
-            return False
+        if not CONFIG["debug"]:
+            return
+        print(f"[DEBUG] {msg}")
+        self._log_fh.write(f"[{datetime.now().isoformat()}] {msg}\n")
     
     def get_executable_name(self):
         """Determina el nombre del ejecutable según el SO"""
-        if self.system == "Windows":
-            return "hardwareMonitor-Windows.exe"
-        elif self.system == "Darwin":
-            return "hardwareMonitor-macOS"
-        else:
-            return "hardwareMonitor-Linux"
+        return _EXEC_NAMES.get(_SYSTEM, "hardwareMonitor-Linux")
     
     def get_current_executable_path(self):
         """Obtiene el path del ejecutable actual"""
@@ -415,27 +1114,32 @@ class GitUpdater:
         self.debug_print(f"Obteniendo última release de {self.repo}...")
         
         try:
-            if not self.test_connection():
-                self.debug_print("No hay conexión a Internet")
-                return None
-            
             url = f"https://api.github.com/repos/{self.repo}/releases/latest"
             self.debug_print(f"URL: {url}")
-            
-            response = requests.get(
+
+            # Request condicional: si nada cambió GitHub responde 304
+            # sin cuerpo y sin consumir rate limit
+            headers = {'If-None-Match': self._etag} if self._etag else {}
+
+            response = self.session.get(
                 url,
-                headers=self.headers,
+                headers=headers,
                 timeout=15
             )
-            
+
             self.debug_print(f"Respuesta HTTP: {response.status_code}")
-            
+
+            if response.status_code == 304:
+                self.debug_print(f"✓ Sin cambios (304), versión cacheada: {self._cached_version}")
+                return self._cached_version
+
             if response.status_code == 200:
                 data = response.json()
                 version = data['tag_name'].lstrip('v')
+                self.save_release_cache(response.headers.get('ETag'), version)
                 self.debug_print(f"✓ Última versión en GitHub: {version}")
                 return version
-            
+
             elif response.status_code == 404:
                 self.debug_print("✗ No hay releases en GitHub")
                 return None
@@ -450,6 +1154,10 @@ class GitUpdater:
                 self.debug_print(f"Respuesta: {response.text}")
                 return None
             
+        except self._conn_error:
+            self.debug_print("✗ No hay conexión a Internet")
+            return None
+
         except Exception as e:
             self.debug_print(f"✗ Error: {type(e).__name__}: {e}")
             return None
@@ -482,27 +1190,44 @@ class GitUpdater:
             url = f"https://github.com/{self.repo}/releases/download/v{version}/{self.executable_name}"
             self.debug_print(f"📥 Descargando desde: {url}")
             
-            response = requests.get(
+            response = self.session.get(
                 url,
-                headers=self.headers,
                 timeout=CONFIG["update_timeout"],
-                stream=True
+                stream=True,
+                # Los ejecutables ya vienen comprimidos: pedir identity
+                # evita una pasada extra de descompresión
+                headers={'Accept-Encoding': 'identity'}
             )
             self.debug_print(f"Respuesta: {response.status_code}")
             
             if response.status_code == 200:
-                with open(self.temp_update_file, "wb") as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                
+                # Copia en bloques de 1 MiB directo a disco: el binario
+                # nunca se materializa completo en memoria. buffering=0
+                # (FileIO crudo) hace un solo os.write por bloque, sin
+                # pasar por el buffer intermedio de io
+                response.raw.decode_content = True
+                with open(self.temp_update_file, "wb", buffering=0) as f:
+                    shutil.copyfileobj(response.raw, f, length=1 << 20)
+
+                # Una descarga cortada no debe quedar como actualización
+                # pendiente: se valida contra el Content-Length
+                expected = int(response.headers.get("Content-Length", 0))
+                actual = os.path.getsize(self.temp_update_file)
+                if expected and actual != expected:
+                    os.remove(self.temp_update_file)
+                    self.debug_print(
+                        f"❌ Descarga incompleta ({actual}/{expected} bytes), descartada")
+                    return
+
                 self.debug_print(f"✅ Descarga completada en: {self.temp_update_file}")
                 self.debug_print(f"⚠️  La actualización se aplicará al reiniciar el programa")
                 
                 with open("version.txt", "w") as f:
                     f.write(version)
                 
-                self.current_version = version
-                
+                with self._version_lock:
+                    self.current_version = version
+
             else:
                 self.debug_print(f"❌ Error: código HTTP {response.status_code}")
                 
@@ -521,7 +1246,8 @@ def main():
     print(f"Versión: {updater.current_version}")
     print(f"BD SQLite: {monitor.db_file}")
     if CONFIG["log_compression"]:
-        print(f"JSON comprimido: {monitor.log_file.with_suffix('.jsonl.gz')}")
+        log_suffix = '.jsonl.zst' if zstd is not None else '.jsonl.gz'
+        print(f"JSON comprimido: {monitor.log_file.with_suffix(log_suffix)}")
     print(f"🌐 Dashboard: http://{CONFIG['flask_host']}:{CONFIG['flask_port']}")
     print("="*60 + "\n")
     
@@ -534,25 +1260,29 @@ def main():
     flask_thread.start()
     print(f"✅ Servidor Flask iniciado en puerto {CONFIG['flask_port']}\n")
     
-    last_update_check = 0
-    
+    # Agenda monotónica: la cadencia no se corre aunque cada muestra
+    # tarde distinto, y los saltos de reloj (NTP) no la afectan
+    metrics_interval = CONFIG["metrics_interval"]
+    next_sample = time.monotonic()
+
     try:
         while monitor.running:
-            monitor.write_metrics()
-            print(f"[METRIC] {datetime.now().strftime('%H:%M:%S')} - Métrica registrada")
-            
-            current_time = time.time()
-            if current_time - last_update_check > CONFIG["check_updates_interval"]:
-                print("\n[UPDATE] Verificando actualizaciones...")
-                updater.check_for_updates()
-                get_db_size_stats()
-                print()
-                last_update_check = current_time
-            
-            time.sleep(CONFIG["metrics_interval"])
+            metrics = monitor.write_metrics()
+            print(f"[METRIC] {metrics['timestamp'][11:19]} - Métrica registrada")
+
+            next_sample += metrics_interval
+            now = time.monotonic()
+            # Si una iteración tardó más que el intervalo (p. ej. una
+            # actualización), saltar a la próxima ranura alineada en vez
+            # de disparar ticks atrasados en ráfaga
+            while next_sample <= now:
+                next_sample += metrics_interval
+            time.sleep(next_sample - now)
     
     except KeyboardInterrupt:
         print("\n✓ Monitor detenido.")
+        monitor.close_db_writer()
+        monitor.flush_log_buffer()
         get_db_size_stats()
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -1,20 +1,67 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, Response
 import sqlite3
+import threading
+import time
 from pathlib import Path
+from datetime import datetime
 import json
 from dotenv import load_dotenv
 from config import CONFIG
 
+try:
+    from waitress import serve
+except ImportError:
+    serve = None
+
+
+def ts_to_iso(value):
+    """Convierte timestamps epoch en microsegundos a ISO-8601.
+
+    Las BDs anteriores guardaban texto ISO: esos valores pasan sin tocar.
+    """
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1_000_000).isoformat(timespec='seconds')
+    return value
+
 class DashboardServer:
     def __init__(self, db_file):
         self.db_file = db_file
         self.app = Flask(__name__, template_folder='templates', static_folder='static')
+        self._local = threading.local()
+        # Cache TTL por endpoint: el dashboard refresca más rápido de
+        # lo que se muestrea, no tiene sentido repetir el mismo SELECT
+        self._cache = {}
+        self._cache_lock = threading.Lock()
         self.setup_routes()
-    
+
+    def _cached(self, key, ttl, query):
+        """Devuelve la respuesta cacheada del endpoint si no venció el TTL"""
+        now = time.monotonic()
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None and now - entry[1] < ttl:
+                return entry[0]
+        response = query()
+        with self._cache_lock:
+            self._cache[key] = (response, time.monotonic())
+        return response
+
     def get_db_connection(self):
-        """Crea una conexión a la BD"""
-        conn = sqlite3.connect(self.db_file)
-        conn.row_factory = sqlite3.Row
+        """Devuelve la conexión de solo lectura del thread actual"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # mode=ro: nunca compite por el lock de escritura; el pool
+            # acotado de waitress limita las conexiones abiertas, así
+            # que cada thread reusa la suya entre requests
+            conn = sqlite3.connect(f"file:{self.db_file}?mode=ro", uri=True)
+            # Lecturas mapeadas a memoria y caché propia generosa: los
+            # SELECT del dashboard no pagan read() por página
+            conn.execute("PRAGMA mmap_size=268435456")
+            conn.execute("PRAGMA cache_size=-32000")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA query_only=1")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
         return conn
     
     def setup_routes(self):
@@ -27,38 +74,106 @@ class DashboardServer:
         @self.app.route('/api/latest')
         def api_latest():
             """Últimas 100 métricas para gráficos"""
+            return self._cached('latest', 4, query_latest)
+
+        def query_latest():
             conn = self.get_db_connection()
             cursor = conn.cursor()
-            
+
+            # SQLite arma el JSON durante el propio scan del índice:
+            # sin dicts intermedios ni re-serialización en Python. El
+            # CASE convierte los timestamps enteros (epoch µs) a ISO y
+            # deja pasar el texto de BDs anteriores
+            try:
+                cursor.execute('''
+                    SELECT json_group_array(json_object(
+                        'timestamp', CASE WHEN typeof(timestamp) = 'integer'
+                            THEN strftime('%Y-%m-%dT%H:%M:%S',
+                                          timestamp / 1000000.0,
+                                          'unixepoch', 'localtime')
+                            ELSE timestamp END,
+                        'cpu_percent', cpu_percent,
+                        'memory_percent', memory_percent,
+                        'disk_percent', disk_percent,
+                        'temp_cpu', COALESCE(temp_cpu, 0),
+                        'temp_gpu', COALESCE(temp_gpu, 0),
+                        'temp_ssd', COALESCE(temp_ssd, 0),
+                        'temp_hdd', COALESCE(temp_hdd, 0),
+                        'network_bytes_sent', network_bytes_sent,
+                        'network_bytes_recv', network_bytes_recv,
+                        'processes_count', processes_count))
+                    FROM (
+                        SELECT * FROM (
+                            SELECT timestamp, cpu_percent, memory_percent, disk_percent,
+                                   temp_cpu, temp_gpu, temp_ssd, temp_hdd,
+                                   network_bytes_sent, network_bytes_recv, processes_count
+                            FROM metrics ORDER BY timestamp DESC LIMIT 100
+                        ) ORDER BY timestamp ASC
+                    )
+                ''')
+                return Response(cursor.fetchone()[0], mimetype='application/json')
+            except sqlite3.OperationalError:
+                pass  # SQLite sin funciones JSON: armar las filas en Python
+
             cursor.execute('''
                 SELECT timestamp, cpu_percent, memory_percent, disk_percent,
-                       COALESCE(temp_cpu, 0) as temp_cpu, 
-                       COALESCE(temp_gpu, 0) as temp_gpu, 
-                       COALESCE(temp_ssd, 0) as temp_ssd, 
+                       COALESCE(temp_cpu, 0) as temp_cpu,
+                       COALESCE(temp_gpu, 0) as temp_gpu,
+                       COALESCE(temp_ssd, 0) as temp_ssd,
                        COALESCE(temp_hdd, 0) as temp_hdd,
                        network_bytes_sent, network_bytes_recv, processes_count
-                FROM metrics 
-                ORDER BY timestamp DESC 
+                FROM metrics
+                ORDER BY timestamp DESC
                 LIMIT 100
             ''')
-            
+
             rows = cursor.fetchall()
-            conn.close()
-            
+
             if not rows:
                 return jsonify([])
-            
+
             data = [dict(row) for row in reversed(rows)]
+            for entry in data:
+                entry["timestamp"] = ts_to_iso(entry["timestamp"])
             return jsonify(data)
         
         @self.app.route('/api/stats')
         def api_stats():
             """Estadísticas generales"""
+            return self._cached('stats', 4, query_stats)
+
+        def query_stats():
             conn = self.get_db_connection()
             cursor = conn.cursor()
-            
+
+            # El monitor mantiene un resumen incremental de una sola
+            # fila: leerlo es O(1) sin importar el tamaño de la tabla
+            try:
+                row = cursor.execute(
+                    'SELECT * FROM metrics_summary WHERE id = 1').fetchone()
+            except sqlite3.OperationalError:
+                row = None  # BD anterior sin la tabla de resumen
+
+            if row and row["total_registros"]:
+                n = row["total_registros"]
+                return jsonify({
+                    "total_registros": n,
+                    "cpu_promedio": row["cpu_sum"] / n,
+                    "cpu_maximo": row["cpu_max"],
+                    "ram_promedio": row["ram_sum"] / n,
+                    "ram_maximo": row["ram_max"],
+                    "disk_promedio": row["disk_sum"] / n,
+                    "disk_maximo": row["disk_max"],
+                    "temp_cpu_avg": row["temp_cpu_sum"] / row["temp_cpu_count"] if row["temp_cpu_count"] else None,
+                    "temp_cpu_max": row["temp_cpu_max"] if row["temp_cpu_count"] else None,
+                    "temp_gpu_avg": row["temp_gpu_sum"] / row["temp_gpu_count"] if row["temp_gpu_count"] else None,
+                    "temp_ssd_avg": row["temp_ssd_sum"] / row["temp_ssd_count"] if row["temp_ssd_count"] else None,
+                    "temp_hdd_avg": row["temp_hdd_sum"] / row["temp_hdd_count"] if row["temp_hdd_count"] else None,
+                    "desde": ts_to_iso(row["desde"])
+                })
+
             cursor.execute('''
-                SELECT 
+                SELECT
                     COUNT(*) as total_registros,
                     AVG(cpu_percent) as cpu_promedio,
                     MAX(cpu_percent) as cpu_maximo,
@@ -76,13 +191,18 @@ class DashboardServer:
             ''')
             
             row = cursor.fetchone()
-            conn.close()
-            
-            return jsonify(dict(row))
+
+            stats = dict(row)
+            stats["desde"] = ts_to_iso(stats["desde"])
+            return jsonify(stats)
         
         @self.app.route('/api/db-size')
         def api_db_size():
             """Tamaño de la BD"""
+            # El tamaño cambia lento: TTL más largo que el de métricas
+            return self._cached('db-size', 30, query_db_size)
+
+        def query_db_size():
             db_path = Path(self.db_file)
             if db_path.exists():
                 size_mb = db_path.stat().st_size / (1024**2)
@@ -91,7 +211,6 @@ class DashboardServer:
                 cursor = conn.cursor()
                 cursor.execute("SELECT COUNT(*) FROM metrics")
                 rows = cursor.fetchone()[0]
-                conn.close()
                 
                 bytes_per_row = (size_mb * 1024 * 1024) / rows if rows > 0 else 0
                 
@@ -109,30 +228,53 @@ class DashboardServer:
             cursor = conn.cursor()
             
             cursor.execute('''
-                SELECT timestamp, temp_cpu, temp_gpu, temp_ssd, temp_hdd, temperatures
+                SELECT timestamp, temp_cpu, temp_gpu, temp_ssd, temp_hdd
                 FROM metrics ORDER BY timestamp DESC LIMIT 1
             ''')
-            
+
             row = cursor.fetchone()
-            conn.close()
-            
+
             if not row:
                 return jsonify({"error": "No hay datos"}), 404
-            
+
+            # Sensores normalizados: se reconstruye el detalle con un join
+            all_sensors = {}
+            try:
+                cursor.execute('''
+                    SELECT sensor_names.name, sensor_readings.value
+                    FROM sensor_readings
+                    JOIN sensor_names ON sensor_names.id = sensor_readings.sensor_id
+                    WHERE sensor_readings.timestamp = ?
+                ''', (row['timestamp'],))
+                all_sensors = dict(cursor.fetchall())
+            except sqlite3.OperationalError:
+                # BD anterior: el detalle vivía como JSON en cada fila
+                legacy = cursor.execute(
+                    'SELECT temperatures FROM metrics ORDER BY timestamp DESC LIMIT 1'
+                ).fetchone()
+                if legacy and legacy['temperatures']:
+                    all_sensors = json.loads(legacy['temperatures'])
+
             temps = {
-                "timestamp": row['timestamp'],
+                "timestamp": ts_to_iso(row['timestamp']),
                 "cpu": row['temp_cpu'],
                 "gpu": row['temp_gpu'],
                 "ssd": row['temp_ssd'],
                 "hdd": row['temp_hdd'],
-                "all_sensors": json.loads(row['temperatures']) if row['temperatures'] else {}
+                "all_sensors": all_sensors
             }
-            
+
             return jsonify(temps)
     
     def run(self, host, port, debug):
-        """Inicia el servidor Flask"""
-        self.app.run(host=host, port=port, debug=debug, use_reloader=False)
+        """Inicia el servidor web"""
+        if serve is not None and not debug:
+            # waitress: pool de threads y keepalive, apto para el
+            # auto-refresh del dashboard (el server de Werkzeug es
+            # solo de desarrollo)
+            serve(self.app, host=host, port=port, threads=4)
+        else:
+            self.app.run(host=host, port=port, debug=debug, use_reloader=False)
 
 def run_flask_server(db_file):
     """Ejecuta Flask en un thread separado"""
@@ -150,11 +292,15 @@ def get_db_size_stats():
         size_mb = db_file.stat().st_size / (1024**2)
         
         conn = sqlite3.connect(db_file)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM metrics")
-        rows = cursor.fetchone()[0]
+        # Lecturas mapeadas a memoria (sin copia kernel->usuario).
+        # COUNT(*) y no max(id): la poda de retención borra filas pero
+        # los ids AUTOINCREMENT nunca se reusan, así que max(id)
+        # sobreestimaría para siempre. Corre una vez por día: no es
+        # camino caliente
+        conn.execute("PRAGMA mmap_size=1073741824")
+        rows = conn.execute("SELECT COUNT(*) FROM metrics").fetchone()[0]
         conn.close()
-        
+
         bytes_per_row = (size_mb * 1024 * 1024) / rows if rows > 0 else 0
         
         print(f"\n📊 Estadísticas de BD:")